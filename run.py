@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """
-Entry point script to run the face tracker.
+Entry point script to run the face tracker (implemented in the src/ package).
 
 Usage:
     python run.py                    # Run face tracker with voice commands
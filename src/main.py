@@ -13,15 +13,20 @@ from threading import Thread
 
 from .shared_state import shared
 from .motor_control import stop_motors
-from .vision_tracker import run_vision_tracker
+from .vision_tracker import start_vision_process
 from .web_stream import run_web_server, PORT
 from .voice_commands import start_voice_commands, list_audio_devices
 from .music_player import start_music_player
 
+# Text-to-speech command. With no text and no --stdin, espeak speaks each
+# stdin line as it arrives (--stdin would wait for EOF), so one process stays warm
+ESPEAK_CMD = ['espeak', '-v', 'en-us+f3', '-s', '150', '-p', '65']
+
 # Global references for cleanup
 voice_thread = None
 music_player = None
 music_cmd_queue = None
+espeak_process = None
 
 
 def get_local_ip():
@@ -47,15 +52,34 @@ def shutdown(signum=None, frame=None):
     if music_player:
         music_player.shutdown()
     
-    stop_motors()
+    if espeak_process and espeak_process.poll() is None:
+        espeak_process.stdin.close()
+        espeak_process.terminate()
+
+
+def get_espeak():
+    """Return the long-lived espeak process, starting it if it isn't running."""
+    global espeak_process
+    
+    if espeak_process is None or espeak_process.poll() is not None:
+        espeak_process = subprocess.Popen(ESPEAK_CMD, stdin=subprocess.PIPE, bufsize=0)
+    return espeak_process
 
 
 def say_greeting():
-    """Speak the greeting using espeak."""
+    """Speak the greeting using the persistent espeak process."""
+    global espeak_process
+    
     message = "hello papi ur so sexy and cute i hope you have a good day and by the way your roommate andrew is so ugly and gay."
     try:
         print(f">>> Speaking: {message}")
-        subprocess.run(['espeak', '-v', 'en-us+f3', '-s', '150', '-p', '65', message])
+        line = (message + '\n').encode()
+        try:
+            get_espeak().stdin.write(line)
+        except BrokenPipeError:
+            # espeak exited underneath us - respawn and retry once
+            espeak_process = None
+            get_espeak().stdin.write(line)
     except Exception as e:
         print(f"TTS error: {e}")
 
@@ -68,7 +92,8 @@ def process_commands():
     global music_cmd_queue
     
     while shared.running:
-        command = shared.get_command(timeout=0.1)
+        # Blocks until a command arrives; shutdown wakes it with None
+        command = shared.get_command()
         
         if command:
             cmd_type = command.get('type')
@@ -76,7 +101,7 @@ def process_commands():
             
             # Greeting command
             if cmd_type == 'greeting':
-                Thread(target=say_greeting, daemon=True).start()
+                say_greeting()
             
             # Tracking commands
             elif cmd_type == 'tracking':
@@ -131,6 +156,15 @@ def main(mic_device=None):
     print("\n  Ctrl+C to stop")
     print("=" * 50 + "\n")
     
+    # Start vision tracker in its own process (forked, so before any threads)
+    vision_process = start_vision_process()
+    
+    # Start TTS engine early so the first greeting doesn't pay startup cost
+    try:
+        get_espeak()
+    except Exception as e:
+        print(f"TTS not available: {e}")
+    
     # Start music player thread
     music_player, music_cmd_queue = start_music_player()
     
@@ -145,13 +179,21 @@ def main(mic_device=None):
     cmd_thread = Thread(target=process_commands, daemon=True)
     cmd_thread.start()
     
-    # Run vision tracker in main thread
+    # Wait for the vision process; it exits once shared.running goes False
     try:
-        run_vision_tracker()
+        vision_process.join()
     except KeyboardInterrupt:
         pass
     finally:
         shutdown()
+        vision_process.join(timeout=3)
+        if vision_process.is_alive():
+            vision_process.terminate()
+            vision_process.join()
+        # Only once the vision process is gone - it drives the motors over the
+        # same I2C bus, and a terminated process never ran its own stop_motors()
+        stop_motors()
+        shared.release_frames()
 
 
 if __name__ == "__main__":
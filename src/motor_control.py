@@ -22,39 +22,40 @@ except Exception as e:
     motor2 = None
 
 
+# Last throttle written to each motor, so unchanged values skip the I2C write
+_last_throttle = [None, None]
+
+
+def _set_throttle(index, motor, value):
+    """Set a motor's throttle only if it changed. Returns True if written."""
+    if motor is None or _last_throttle[index] == value:
+        return False
+    motor.throttle = value
+    _last_throttle[index] = value
+    return True
+
+
+def _direction(offset):
+    """Return 1, -1 or 0 depending on which side of the dead zone offset falls."""
+    return int(offset > DEAD_ZONE) - int(offset < -DEAD_ZONE)
+
+
 def control_motors(offset_x, offset_y):
     """Control motors based on face offset from center."""
     if not MOTOR_AVAILABLE:
         return
     
-    # Horizontal control (M1)
-    if motor1 is not None:
-        if offset_x > DEAD_ZONE:
-            # Face is to the right, turn motor to follow
-            motor1.throttle = -MOTOR_SPEED
-        elif offset_x < -DEAD_ZONE:
-            # Face is to the left, turn motor to follow
-            motor1.throttle = MOTOR_SPEED
-        else:
-            motor1.throttle = 0
+    # Horizontal control (M1) - face to the right turns the motor negative to follow
+    _set_throttle(0, motor1, -MOTOR_SPEED * _direction(offset_x))
     
-    # Vertical control (M2)
-    if motor2 is not None:
-        if offset_y > DEAD_ZONE:
-            # Face is too low, turn motor to follow
-            motor2.throttle = MOTOR_SPEED
-        elif offset_y < -DEAD_ZONE:
-            # Face is too high, turn motor to follow
-            motor2.throttle = -MOTOR_SPEED
-        else:
-            motor2.throttle = 0
+    # Vertical control (M2) - face too low turns the motor positive to follow
+    _set_throttle(1, motor2, MOTOR_SPEED * _direction(offset_y))
 
 
 def stop_motors():
     """Stop both motors."""
     if MOTOR_AVAILABLE:
-        if motor1 is not None:
-            motor1.throttle = 0
-        if motor2 is not None:
-            motor2.throttle = 0
-        print("Motors stopped")
+        stopped = _set_throttle(0, motor1, 0)
+        stopped = _set_throttle(1, motor2, 0) or stopped
+        if stopped:
+            print("Motors stopped")
@@ -18,15 +18,45 @@ except ImportError:
     print("python-vlc not available - run: pip install python-vlc")
     print("Also install VLC: sudo apt-get install vlc")
 
+# RapidFuzz C extension for fuzzy matching, falls back to difflib
+try:
+    from rapidfuzz import process, fuzz
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    RAPIDFUZZ_AVAILABLE = False
+
 # Supported audio formats
 AUDIO_EXTENSIONS = ('.mp3', '.wav', '.m4a', '.ogg', '.flac', '.aac')
 MUSIC_FOLDER = "./music"
 
 
+def _walk_audio_files(folder):
+    """
+    Yield a DirEntry for every audio file under folder.
+    Files in a directory come before its subdirectories, like os.walk.
+    Unreadable directories are skipped, like os.walk.
+    """
+    subdirs = []
+    try:
+        it = os.scandir(folder)
+    except OSError:
+        return
+    
+    with it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.name.lower().endswith(AUDIO_EXTENSIONS):
+                yield entry
+    
+    for path in subdirs:
+        yield from _walk_audio_files(path)
+
+
 def index_music_folder(folder=MUSIC_FOLDER):
     """
     Recursively index all audio files in the music folder.
-    Returns a list of (filename, full_path) tuples.
+    Returns a list of song dicts (name, name_lower, filename, path).
     """
     music_files = []
     
@@ -35,25 +65,24 @@ def index_music_folder(folder=MUSIC_FOLDER):
         print(f"Create it with: mkdir -p {folder}")
         return music_files
     
-    for root, dirs, files in os.walk(folder):
-        for file in files:
-            if file.lower().endswith(AUDIO_EXTENSIONS):
-                full_path = os.path.join(root, file)
-                # Store filename without extension for matching
-                name_without_ext = os.path.splitext(file)[0]
-                music_files.append({
-                    'name': name_without_ext,
-                    'filename': file,
-                    'path': full_path
-                })
+    for entry in _walk_audio_files(folder):
+        # Store filename without extension for matching
+        name_without_ext = os.path.splitext(entry.name)[0]
+        music_files.append({
+            'name': name_without_ext,
+            'name_lower': name_without_ext.lower(),
+            'filename': entry.name,
+            'path': entry.path
+        })
     
     return music_files
 
 
-def find_best_match(query, music_files):
+def find_best_match(query, music_files, names_lower=None):
     """
     Find the best matching song for a query.
     Uses fuzzy string matching.
+    Pass names_lower (list of each song's 'name_lower') to skip rebuilding it per query.
     """
     if not music_files:
         return None
@@ -62,23 +91,54 @@ def find_best_match(query, music_files):
         # Return first song if no query
         return music_files[0]
     
+    if names_lower is None:
+        names_lower = [song['name_lower'] for song in music_files]
+    
     query_lower = query.lower()
+    query_len = len(query_lower)
     best_match = None
     best_score = 0
     
-    for song in music_files:
-        name_lower = song['name'].lower()
-        
-        # Check for substring match first
+    # Check for substring matches first
+    for song, name_lower in zip(music_files, names_lower):
         if query_lower in name_lower:
-            score = len(query_lower) / len(name_lower) + 0.5
-        else:
-            # Use fuzzy matching
+            score = query_len / len(name_lower) + 0.5
+            if score > best_score:
+                best_score = score
+                best_match = song
+    
+    # Use fuzzy matching (SequenceMatcher ratio) unless a substring match already won
+    if best_score >= 1.0:
+        pass  # No ratio can beat this substring match
+    elif RAPIDFUZZ_AVAILABLE:
+        # fuzz.ratio is an Indel (LCS) ratio, never below SequenceMatcher's ratio.
+        # Use it only to shortlist names, best first, and rescore those with
+        # SequenceMatcher so the pick is the same as the difflib path below.
+        # The shortlist errs wide (extract's cutoff isn't float-exact).
+        target = max(best_score, 0.3)
+        candidates = process.extract(
+            query_lower, names_lower,
+            scorer=fuzz.ratio,
+            limit=None,
+            score_cutoff=target * 100 - 0.01
+        )
+        fuzzy_score, fuzzy_index = 0, len(names_lower)
+        for _, bound, index in candidates:
+            if bound / 100 < max(target, fuzzy_score) - 1e-4:
+                break  # Neither this name nor any after it can score higher
+            score = SequenceMatcher(None, query_lower, names_lower[index]).ratio()
+            # Ties go to the earlier song, as in the difflib loop
+            if score > fuzzy_score or (score == fuzzy_score and index < fuzzy_index):
+                fuzzy_score, fuzzy_index = score, index
+        if fuzzy_score > best_score:
+            best_score = fuzzy_score
+            best_match = music_files[fuzzy_index]
+    else:
+        for song, name_lower in zip(music_files, names_lower):
             score = SequenceMatcher(None, query_lower, name_lower).ratio()
-        
-        if score > best_score:
-            best_score = score
-            best_match = song
+            if score > best_score:
+                best_score = score
+                best_match = song
     
     # Only return if score is reasonable
     if best_score > 0.3:
@@ -102,6 +162,7 @@ class MusicPlayerThread(Thread):
         
         # Music library
         self.music_files = []
+        self._names_lower = []
         self.current_song = None
     
     def _init_vlc(self):
@@ -124,6 +185,7 @@ class MusicPlayerThread(Thread):
     def _index_library(self):
         """Index the music folder."""
         self.music_files = index_music_folder(MUSIC_FOLDER)
+        self._names_lower = [song['name_lower'] for song in self.music_files]
         print(f"[Music] Indexed {len(self.music_files)} songs in {MUSIC_FOLDER}")
         
         if self.music_files:
@@ -149,7 +211,7 @@ class MusicPlayerThread(Thread):
         
         # Search for song
         if query:
-            song = find_best_match(query, self.music_files)
+            song = find_best_match(query, self.music_files, self._names_lower)
         elif self.music_files:
             song = self.music_files[0]
         else:
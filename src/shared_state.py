@@ -1,61 +1,180 @@
 """
 Shared state for thread-safe communication between components.
+Frames and the running/tracking flags are also shared with a forked
+vision process (see share_frames).
 """
 
-from threading import Lock
-from queue import Queue
+import multiprocessing
+from collections import deque
+from multiprocessing import shared_memory
+from threading import Event
+
+import numpy as np
+
+# Child processes are forked so they inherit the shared state below
+_mp = multiprocessing.get_context('fork')
 
 
 class SharedState:
-    """Thread-safe shared state for frame and commands."""
+    """Thread-safe (and fork-safe) shared state for frame and commands."""
     
     def __init__(self):
-        self._frame = None
-        self._frame_lock = Lock()
-        self._command_queue = Queue()
-        self._running = True
-        self._tracking_enabled = True
-    
-    def set_frame(self, frame):
-        """Update the current frame (thread-safe)."""
+        # Double buffer: producer fills the back buffer while consumers read the front
+        self._buffers = [None, None]
+        self._active = _mp.RawValue('i', 0)
+        self._frame_lock = _mp.Lock()
+        self._frame_cond = _mp.Condition(self._frame_lock)
+        self._shm = None
+        # Bumped on every publish so readers can tell a new frame from one they've seen
+        self._frame_version = _mp.RawValue('L', 0)
+        # Latest frame as JPEG, encoded once by the producer for every stream client
+        self._jpeg = None
+        self._jpeg_buf = None
+        self._jpeg_len = _mp.RawValue('i', 0)
+        # deque append/popleft are atomic; the event just wakes a waiting consumer
+        self._command_deque = deque()
+        self._command_event = Event()
+        self._running = _mp.RawValue('b', True)
+        self._stopped = Event()
+        self._tracking_enabled = _mp.RawValue('b', True)
+    
+    def share_frames(self, shape):
+        """
+        Move the frame double buffer into shared memory so a forked process
+        can publish frames that this process reads without copying.
+        A third frame-sized slot holds the encoded JPEG.
+        Must be called before forking.
+        """
+        size = int(np.prod(shape))
+        self._shm = shared_memory.SharedMemory(create=True, size=3 * size)
+        self._buffers = [
+            np.ndarray(shape, np.uint8, buffer=self._shm.buf, offset=i * size)
+            for i in range(2)
+        ]
+        self._jpeg_buf = self._shm.buf[2 * size:]
+        self._jpeg_len.value = 0
+    
+    def release_frames(self):
+        """Free the shared-memory frame buffers once every process is done with them."""
+        if self._shm is None:
+            return
+        
+        # Readers check _shm under the lock, so clear it together with the buffers
+        with self._frame_lock:
+            self._buffers = [None, None]
+            self._jpeg_buf.release()
+            self._jpeg_buf = None
+            shm, self._shm = self._shm, None
+        
+        try:
+            shm.close()
+        except BufferError:
+            pass  # A consumer still holds a view; the mapping goes away at exit
+        shm.unlink()
+    
+    def get_back_buffer(self):
+        """Get the inactive frame buffer so the producer can capture into it in place."""
+        return self._buffers[1 - self._active.value]
+    
+    def set_frame(self, frame, jpeg=None):
+        """
+        Publish a frame and optionally its JPEG encoding (thread-safe).
+        The frame is shared, not copied - don't modify it after publishing.
+        In shared-memory mode a frame not captured into the back buffer is
+        copied into it.
+        """
+        back = 1 - self._active.value
+        if self._shm is not None and frame is not self._buffers[back]:
+            np.copyto(self._buffers[back], frame)
+        
         with self._frame_lock:
-            self._frame = frame.copy() if frame is not None else None
+            if self._shm is None:
+                self._buffers[back] = frame
+                self._jpeg = jpeg
+            elif jpeg is not None and len(jpeg) <= len(self._jpeg_buf):
+                self._jpeg_buf[:len(jpeg)] = jpeg
+                self._jpeg_len.value = len(jpeg)
+            else:
+                self._jpeg_len.value = 0
+            self._active.value = back
+            self._frame_version.value += 1
+            self._frame_cond.notify_all()
+    
+    def wait_for_frame(self, timeout=None):
+        """Block until a new frame is published. Returns False on timeout."""
+        with self._frame_cond:
+            return self._frame_cond.wait(timeout)
     
-    def get_frame(self):
-        """Get the current frame (thread-safe)."""
+    def get_jpeg_if_new(self, last_version):
+        """
+        Get the current frame's JPEG bytes (or None) and its version if it's
+        newer than last_version, otherwise (None, last_version).
+        """
         with self._frame_lock:
-            return self._frame.copy() if self._frame is not None else None
+            version = self._frame_version.value
+            if version == last_version:
+                return None, last_version
+            if self._shm is None:
+                return self._jpeg, version
+            length = self._jpeg_len.value
+            return (bytes(self._jpeg_buf[:length]) if length else None), version
     
     def put_command(self, command):
         """Add a command to the queue."""
-        self._command_queue.put(command)
+        self._command_deque.append(command)
+        self._command_event.set()
     
     def get_command(self, timeout=None):
-        """Get a command from the queue (blocking with optional timeout)."""
+        """
+        Get a command from the queue (blocking with optional timeout).
+        Returns None on timeout or once running is set to False.
+        """
         try:
-            return self._command_queue.get(timeout=timeout)
-        except:
+            return self._command_deque.popleft()
+        except IndexError:
+            pass
+        
+        # Re-check after clearing so a put (or shutdown) that raced the clear isn't missed
+        self._command_event.clear()
+        try:
+            return self._command_deque.popleft()
+        except IndexError:
+            if not self._running.value:
+                return None
+        
+        self._command_event.wait(timeout)
+        try:
+            return self._command_deque.popleft()
+        except IndexError:
             return None
     
     def has_command(self):
         """Check if there are commands in the queue."""
-        return not self._command_queue.empty()
+        return bool(self._command_deque)
     
     @property
     def running(self):
-        return self._running
+        return bool(self._running.value)
     
     @running.setter
     def running(self, value):
-        self._running = value
+        self._running.value = bool(value)
+        if not value:
+            # Wake anyone blocked in get_command or wait_for_shutdown so they can exit
+            self._command_event.set()
+            self._stopped.set()
+    
+    def wait_for_shutdown(self, timeout=None):
+        """Block until running is set to False. Returns False on timeout."""
+        return self._stopped.wait(timeout)
     
     @property
     def tracking_enabled(self):
-        return self._tracking_enabled
+        return bool(self._tracking_enabled.value)
     
     @tracking_enabled.setter
     def tracking_enabled(self, value):
-        self._tracking_enabled = value
+        self._tracking_enabled.value = bool(value)
 
 
 # Global shared state instance
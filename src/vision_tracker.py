@@ -3,17 +3,37 @@ Vision tracking module.
 Handles camera capture, face detection, and motor control commands.
 """
 
+import os
 import cv2
+import numpy as np
+import signal
 import sys
 import time
+import multiprocessing
 
 from .shared_state import shared
 from .motor_control import control_motors, stop_motors
+from .web_stream import encode_jpeg
 
 # Configuration
 CAMERA_INDEX = 0
+CAMERA_FPS = 30
+TARGET_FPS = CAMERA_FPS  # Tracking loop rate
+CAMERA_BUFFER_SIZE = 1  # Frames the driver may queue; a stale read drops at most this many
 FRAME_WIDTH = 640
 FRAME_HEIGHT = 480
+DETECT_SCALE = 2  # Run face detection on a frame downscaled by this factor
+DETECT_INTERVAL = 5  # Run full detection every N frames, track in between
+DETECT_SIZE = (FRAME_WIDTH // DETECT_SCALE, FRAME_HEIGHT // DETECT_SCALE)
+TRACK_SEARCH_MARGIN = 16  # Template tracker search radius, in DETECT_SIZE pixels
+TRACK_MIN_SCORE = 0.5  # Template match score below which the face counts as lost
+
+# DNN face detector (UltraFace ONNX, fp32 or int8-quantized). Falls back to Haar if missing.
+FACE_MODEL_PATH = "./models/version-slim-320.onnx"
+FACE_MODEL_INPUT = (320, 240)
+FACE_CONFIDENCE = 0.7
+
+_warned_no_tracker = False
 
 
 def load_face_cascade():
@@ -32,9 +52,152 @@ def load_face_cascade():
     return face_cascade
 
 
+def load_face_detector():
+    """
+    Load the DNN face detector if its model is present.
+    Falls back to the Haar cascade otherwise.
+    """
+    if os.path.exists(FACE_MODEL_PATH):
+        try:
+            net = cv2.dnn.readNetFromONNX(FACE_MODEL_PATH)
+            net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+            net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+            print(f"Loaded DNN face detector from {FACE_MODEL_PATH}")
+            return net
+        except cv2.error as e:
+            print(f"Failed to load DNN face detector: {e}")
+    else:
+        print(f"DNN face model not found at {FACE_MODEL_PATH}, using Haar cascade")
+    
+    return load_face_cascade()
+
+
+class TemplateTracker:
+    """
+    Fallback tracker for OpenCV builds without the contrib trackers.
+    Follows the face by template matching in a window around its last box.
+    """
+    
+    def init(self, image, bbox):
+        image = image.get() if isinstance(image, cv2.UMat) else image
+        x, y, w, h = bbox
+        self._template = image[y:y + h, x:x + w].copy()
+        self._bbox = bbox
+    
+    def update(self, image):
+        """Return (ok, bbox) like the OpenCV trackers."""
+        image = image.get() if isinstance(image, cv2.UMat) else image
+        x, y, w, h = self._bbox
+        x0 = max(0, x - TRACK_SEARCH_MARGIN)
+        y0 = max(0, y - TRACK_SEARCH_MARGIN)
+        window = image[y0:y + h + TRACK_SEARCH_MARGIN, x0:x + w + TRACK_SEARCH_MARGIN]
+        if window.shape[0] < h or window.shape[1] < w:
+            return False, self._bbox
+        
+        scores = cv2.matchTemplate(window, self._template, cv2.TM_CCOEFF_NORMED)
+        _, best, _, (dx, dy) = cv2.minMaxLoc(scores)
+        if best < TRACK_MIN_SCORE:
+            return False, self._bbox
+        
+        self._bbox = (x0 + dx, y0 + dy, w, h)
+        return True, self._bbox
+
+
+def create_face_tracker():
+    """
+    Create a lightweight tracker for following a detected face.
+    Uses a correlation tracker from opencv-contrib when present, otherwise
+    template matching (opencv-python ships no trackers).
+    """
+    global _warned_no_tracker
+    
+    legacy = getattr(cv2, 'legacy', None)
+    if legacy is not None and hasattr(legacy, 'TrackerMOSSE_create'):
+        return legacy.TrackerMOSSE_create()
+    if hasattr(cv2, 'TrackerKCF_create'):
+        return cv2.TrackerKCF_create()
+    
+    if not _warned_no_tracker:
+        print("No OpenCV correlation tracker (needs opencv-contrib-python), using template matching")
+        _warned_no_tracker = True
+    return TemplateTracker()
+
+
+def detect_largest_face(detector, frame, gray):
+    """
+    Find the largest face and return its box in DETECT_SIZE coordinates,
+    or None.
+    
+    The DNN detector runs on the full-res BGR frame; the Haar cascade runs
+    on the downscaled grayscale image (ndarray or UMat).
+    """
+    if isinstance(detector, cv2.CascadeClassifier):
+        return _detect_cascade(detector, gray)
+    return _detect_dnn(detector, frame, *DETECT_SIZE)
+
+
+def _detect_dnn(net, frame, width, height):
+    """Run the UltraFace network and return the largest confident box, or None."""
+    blob = cv2.dnn.blobFromImage(
+        frame, 1 / 128.0, FACE_MODEL_INPUT, (127, 127, 127), swapRB=True
+    )
+    net.setInput(blob)
+    scores, boxes = net.forward(['scores', 'boxes'])
+    
+    # Boxes are normalized (x1, y1, x2, y2) corners
+    boxes = boxes[0][scores[0][:, 1] > FACE_CONFIDENCE]
+    if len(boxes) == 0:
+        return None
+    
+    boxes = boxes * (width, height, width, height)
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    x1, y1, x2, y2 = boxes[areas.argmax()]
+    x1, y1 = max(0, int(x1)), max(0, int(y1))
+    w, h = min(width, int(x2)) - x1, min(height, int(y2)) - y1
+    if w <= 0 or h <= 0:
+        return None
+    return (x1, y1, w, h)
+
+
+def _detect_cascade(face_cascade, gray):
+    """Run the Haar cascade and return the largest face box, or None."""
+    faces = face_cascade.detectMultiScale(
+        gray,
+        scaleFactor=1.1,
+        minNeighbors=5,
+        minSize=(30 // DETECT_SCALE, 30 // DETECT_SCALE),
+        flags=cv2.CASCADE_SCALE_IMAGE
+    )
+    
+    if len(faces) == 0:
+        return None
+    
+    if len(faces) == 1:
+        largest_face = faces[0]
+    else:
+        faces = np.asarray(faces)
+        largest_face = faces[np.argmax(faces[:, 2] * faces[:, 3])]
+    return tuple(int(v) for v in largest_face)
+
+
+def read_latest_frame(cap, dst, last_read):
+    """
+    Read the newest camera frame into dst.
+    If the loop fell behind since last_read, grab and drop the frames the
+    driver queued in the meantime so we never act on a stale image.
+    The driver queues at most CAMERA_BUFFER_SIZE frames; any further grab
+    would block waiting for a new frame and put us further behind.
+    """
+    queued = int((time.monotonic() - last_read) * CAMERA_FPS) - 1
+    for _ in range(min(queued, CAMERA_BUFFER_SIZE)):
+        if not cap.grab():
+            return False, dst
+    return cap.read(dst)
+
+
 def run_vision_tracker():
     """Main vision tracking loop."""
-    face_cascade = load_face_cascade()
+    face_detector = load_face_detector()
     
     # Open camera
     cap = cv2.VideoCapture(CAMERA_INDEX)
@@ -43,39 +206,79 @@ def run_vision_tracker():
         print(f"Error: Could not open camera at index {CAMERA_INDEX}")
         sys.exit(1)
     
+    # Ask for compressed MJPG so USB bandwidth doesn't cap the frame rate
+    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc('M', 'J', 'P', 'G'))
     cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_WIDTH)
     cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_HEIGHT)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, CAMERA_BUFFER_SIZE)  # Don't queue stale frames
+    
+    # Keep grayscale/downscale/detection on the OpenCL device when one exists
+    cv2.ocl.setUseOpenCL(True)
+    use_umat = cv2.ocl.useOpenCL()
+    
+    print(f"Camera ready (OpenCL: {'on' if use_umat else 'off'})")
+    
+    # Preallocate detection buffers so the loop doesn't allocate per frame
+    if use_umat:
+        gray = cv2.UMat(FRAME_HEIGHT, FRAME_WIDTH, cv2.CV_8UC1)
+        small = cv2.UMat(DETECT_SIZE[1], DETECT_SIZE[0], cv2.CV_8UC1)
+    else:
+        gray = np.empty((FRAME_HEIGHT, FRAME_WIDTH), np.uint8)
+        small = np.empty((DETECT_SIZE[1], DETECT_SIZE[0]), np.uint8)
     
-    print("Camera ready")
+    frame_idx = 0
+    tracker = None
+    last_read = time.monotonic()
+    tick_interval = 1.0 / TARGET_FPS
+    next_tick = time.monotonic()
     
     try:
         while shared.running:
-            ret, frame = cap.read()
+            # Capture straight into the shared back buffer (no per-frame allocation)
+            ret, frame = read_latest_frame(cap, shared.get_back_buffer(), last_read)
+            last_read = time.monotonic()
             
             if not ret:
                 time.sleep(0.1)
                 continue
             
+            # Camera ignored the requested size - keep frames at FRAME_WIDTH x FRAME_HEIGHT
+            if frame.shape[:2] != (FRAME_HEIGHT, FRAME_WIDTH):
+                frame = cv2.resize(frame, (FRAME_WIDTH, FRAME_HEIGHT), dst=shared.get_back_buffer())
+            
             # Convert to grayscale for face detection
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            src = cv2.UMat(frame) if use_umat else frame
+            gray = cv2.cvtColor(src, cv2.COLOR_BGR2GRAY, dst=gray)
             
-            # Detect faces
-            faces = face_cascade.detectMultiScale(
-                gray,
-                scaleFactor=1.1,
-                minNeighbors=5,
-                minSize=(30, 30)
-            )
+            # Downscale before detection - cascade cost grows with pixel count
+            small = cv2.resize(gray, DETECT_SIZE, dst=small, interpolation=cv2.INTER_AREA)
+            
+            # Full detection every DETECT_INTERVAL frames, cheap tracking in between
+            face = None
+            if tracker is None or frame_idx % DETECT_INTERVAL == 0:
+                face = detect_largest_face(face_detector, frame, small)
+                tracker = None
+                if face is not None:
+                    tracker = create_face_tracker()
+                    if tracker is not None:
+                        tracker.init(small, face)
+            else:
+                ok, bbox = tracker.update(small)
+                if ok:
+                    face = tuple(int(v) for v in bbox)
+                else:
+                    # Lost the face, force re-detection next frame
+                    tracker = None
+            frame_idx += 1
             
             frame_height, frame_width = frame.shape[:2]
             frame_center_x = frame_width // 2
             frame_center_y = frame_height // 2
             
             # Track the largest face
-            if len(faces) > 0:
-                # Find largest face
-                largest_face = max(faces, key=lambda f: f[2] * f[3])
-                x, y, w, h = largest_face
+            if face is not None:
+                # Scale back to full-frame coordinates
+                x, y, w, h = (v * DETECT_SCALE for v in face)
                 
                 # Draw rectangle around face
                 cv2.rectangle(frame, (x, y), (x + w, y + h), (255, 255, 255), 2)
@@ -95,12 +298,40 @@ def run_vision_tracker():
                 # No face detected, stop motors
                 stop_motors()
             
-            # Update shared frame for streaming
-            shared.set_frame(frame)
+            # Update shared frame for streaming, encoded once for all clients
+            shared.set_frame(frame, encode_jpeg(frame))
             
-            time.sleep(0.01)
+            # Sleep only for what's left of this tick; resync if we overran
+            next_tick += tick_interval
+            slack = next_tick - time.monotonic()
+            if slack > 0:
+                time.sleep(slack)
+            else:
+                next_tick = time.monotonic()
             
     finally:
         print("Closing camera...")
         cap.release()
         stop_motors()
+
+
+def _vision_process_main():
+    """Entry point for the forked vision process."""
+    # Ctrl+C reaches the whole process group; the parent coordinates shutdown
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    run_vision_tracker()
+
+
+def start_vision_process():
+    """
+    Start the vision tracker in its own process and return it.
+    Frames come back through shared memory. The process is forked, so
+    call this before starting any threads.
+    """
+    shared.share_frames((FRAME_HEIGHT, FRAME_WIDTH, 3))
+    process = multiprocessing.get_context('fork').Process(
+        target=_vision_process_main, name='vision', daemon=True
+    )
+    process.start()
+    return process
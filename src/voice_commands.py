@@ -5,9 +5,12 @@ Runs in a background thread and publishes commands to the shared queue.
 
 import os
 import json
+import functools
 import re
-import time
-from threading import Thread
+from queue import SimpleQueue
+from threading import Event, Thread
+
+import numpy as np
 
 # Audio capture
 try:
@@ -26,12 +29,48 @@ except ImportError:
     VOSK_AVAILABLE = False
     print("vosk not available - run: pip install vosk")
 
+# WebRTC voice activity detection (falls back to an RMS energy gate)
+try:
+    import webrtcvad
+    WEBRTCVAD_AVAILABLE = True
+except ImportError:
+    WEBRTCVAD_AVAILABLE = False
+
 from .shared_state import shared
 
 # Configuration
 MODEL_PATH = "./models/vosk-model-small-en-us-0.15"
 SAMPLE_RATE = 16000
-BLOCK_SIZE = 8000
+BLOCK_SIZE = 1600  # 100 ms of audio per callback
+PARTIAL_INTERVAL = 2  # Check Vosk's partial result every N decoded blocks
+
+# Voice activity gate - silent blocks skip the Vosk decoder
+VAD_AGGRESSIVENESS = 2  # 0 (least) to 3 (most aggressive about filtering non-speech)
+VAD_FRAME_BYTES = SAMPLE_RATE // 50 * 2  # 20 ms of int16 audio
+RMS_THRESHOLD = 300  # Fallback energy gate, in int16 amplitude
+# Silent blocks (~1 s) still decoded after speech so Vosk can endpoint
+TRAILING_SILENCE_BLOCKS = SAMPLE_RATE // BLOCK_SIZE
+
+# Device names that look like a USB/webcam microphone
+_USB_MIC_RE = re.compile(r'usb|webcam|camera|c920|c270|logitech', re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=1)
+def _cached_devices():
+    """Query PortAudio's device list once and reuse it."""
+    return list(sd.query_devices())
+
+
+@functools.lru_cache(maxsize=1)
+def _default_input_device():
+    """Index of the default input device (cached)."""
+    return sd.default.device[0]
+
+
+def refresh_devices():
+    """Forget the cached device list, e.g. after a microphone is plugged in."""
+    _cached_devices.cache_clear()
+    _default_input_device.cache_clear()
 
 
 def list_audio_devices():
@@ -44,7 +83,8 @@ def list_audio_devices():
     print("  AUDIO INPUT DEVICES")
     print("=" * 50)
     
-    devices = sd.query_devices()
+    devices = _cached_devices()
+    default_input = _default_input_device()
     input_devices = []
     
     for i, device in enumerate(devices):
@@ -55,7 +95,7 @@ def list_audio_devices():
                 'channels': device['max_input_channels'],
                 'sample_rate': device['default_samplerate']
             })
-            marker = " <-- default" if i == sd.default.device[0] else ""
+            marker = " <-- default" if i == default_input else ""
             print(f"  [{i}] {device['name']}{marker}")
             print(f"      Channels: {device['max_input_channels']}, "
                   f"Sample Rate: {device['default_samplerate']}")
@@ -69,21 +109,16 @@ def find_usb_microphone():
     if not SOUNDDEVICE_AVAILABLE:
         return None
     
-    devices = sd.query_devices()
+    devices = _cached_devices()
     
     # Look for USB/webcam microphones
-    keywords = ['usb', 'webcam', 'camera', 'c920', 'c270', 'logitech']
-    
     for i, device in enumerate(devices):
-        if device['max_input_channels'] > 0:
-            name_lower = device['name'].lower()
-            for keyword in keywords:
-                if keyword in name_lower:
-                    print(f"Found USB microphone: [{i}] {device['name']}")
-                    return i
+        if device['max_input_channels'] > 0 and _USB_MIC_RE.search(device['name']):
+            print(f"Found USB microphone: [{i}] {device['name']}")
+            return i
     
     # Fall back to default input device
-    default_input = sd.default.device[0]
+    default_input = _default_input_device()
     if default_input is not None:
         print(f"Using default input device: [{default_input}]")
         return default_input
@@ -91,53 +126,94 @@ def find_usb_microphone():
     return None
 
 
+# Exact phrases for each command
+_GREETINGS = frozenset(('hello', 'hi', 'hey', 'hello debo'))
+_PAUSE = frozenset(('pause', 'pause music', 'pause it'))
+_STOP = frozenset(('stop', 'stop music', 'stop it', 'stop playing'))
+
+# Exact phrase -> command, checked with a single dict lookup
+_EXACT = {
+    **dict.fromkeys(_GREETINGS, {'type': 'greeting', 'action': 'hello'}),
+    **dict.fromkeys(_PAUSE, {'type': 'music', 'action': 'pause'}),
+    **dict.fromkeys(_STOP, {'type': 'music', 'action': 'stop'}),
+}
+
+# Phrases acted on as soon as they show up in a partial result.
+# None of them is a prefix of a different command (unlike plain 'stop').
+_EARLY_COMMANDS = _PAUSE | frozenset(('stop music', 'stop it', 'stop playing'))
+
+# Volume/tracking phrases (matched at the start of the text), one group per command
+_CMD_RE = re.compile(
+    r"(?P<vol_up>volume up|louder|turn it up|increase volume)"
+    r"|(?P<vol_down>volume down|quieter|turn it down|decrease volume)"
+    r"|(?P<track_on>tracking on|enable tracking|start tracking|track me)"
+    r"|(?P<track_off>tracking off|disable tracking|stop tracking|don't track)"
+)
+_CMD_TABLE = {
+    'vol_up': {'type': 'volume', 'action': 'up'},
+    'vol_down': {'type': 'volume', 'action': 'down'},
+    'track_on': {'type': 'tracking', 'action': 'on'},
+    'track_off': {'type': 'tracking', 'action': 'off'},
+}
+
+# "play" with an optional song name; rejects words like "player" or "playing"
+_PLAY_RE = re.compile(r"play(?:\s+(.+))?$")
+
+
 def parse_command(text):
     """
     Parse recognized text into a command dict.
     Returns None if no command matched.
     """
-    text = text.lower().strip()
+    # Blank results are common between utterances - bail out before any work
+    if not text:
+        return None
     
+    text = text.strip()
     if not text:
         return None
+    text = text.lower()
     
-    # Greeting command
-    if text in ['hello', 'hi', 'hey', 'hello debo']:
-        return {'type': 'greeting', 'action': 'hello'}
+    # Greeting, pause and stop commands
+    command = _EXACT.get(text)
+    if command:
+        return dict(command)
     
     # Music commands
-    if text.startswith('play'):
-        # Extract optional song name after "play"
-        query = text[4:].strip()
+    match = _PLAY_RE.match(text)
+    if match:
         return {
             'type': 'music',
             'action': 'play',
-            'query': query if query else None
+            'query': match.group(1)
         }
     
-    if text in ['pause', 'pause music', 'pause it']:
-        return {'type': 'music', 'action': 'pause'}
-    
-    if text in ['stop', 'stop music', 'stop it', 'stop playing']:
-        return {'type': 'music', 'action': 'stop'}
-    
-    # Volume commands
-    if re.match(r'volume up|louder|turn it up|increase volume', text):
-        return {'type': 'volume', 'action': 'up'}
-    
-    if re.match(r'volume down|quieter|turn it down|decrease volume', text):
-        return {'type': 'volume', 'action': 'down'}
-    
-    # Tracking commands
-    if re.match(r'tracking on|enable tracking|start tracking|track me', text):
-        return {'type': 'tracking', 'action': 'on'}
-    
-    if re.match(r'tracking off|disable tracking|stop tracking|don\'t track', text):
-        return {'type': 'tracking', 'action': 'off'}
+    # Volume and tracking commands
+    match = _CMD_RE.match(text)
+    if match:
+        return dict(_CMD_TABLE[match.lastgroup])
     
     return None
 
 
+# Fast path for pulling a field out of a Vosk result without a full JSON parse
+_TEXT_RE = re.compile(r'"text"\s*:\s*"([^"\\]*)"')
+_PARTIAL_RE = re.compile(r'"partial"\s*:\s*"([^"\\]*)"')
+
+
+def _result_text(result_json, pattern=_TEXT_RE, key='text'):
+    """Extract the recognized text (or partial text) from a Vosk result JSON string."""
+    match = pattern.search(result_json)
+    if match:
+        return match.group(1)
+    
+    # Escaped characters or an unexpected layout - fall back to a real parse
+    try:
+        return json.loads(result_json).get(key, '')
+    except ValueError:
+        return ''
+
+
 def print_vosk_instructions():
     """Print instructions for downloading the Vosk model."""
     print("\n" + "=" * 60)
@@ -175,6 +251,14 @@ class VoiceCommandThread(Thread):
         self.model = None
         self.recognizer = None
         self._running = True
+        self._stop_event = Event()
+        self.vad = webrtcvad.Vad(VAD_AGGRESSIVENESS) if WEBRTCVAD_AVAILABLE else None
+        self._silent_blocks = TRAILING_SILENCE_BLOCKS
+        self._preroll = bytearray()  # Last gated block, queued ahead of the next speech
+        self._energy = np.empty(BLOCK_SIZE, np.float32)  # Scratch for the RMS gate
+        # Audio blocks handed from the PortAudio callback to the decoder thread
+        self._audio_q = SimpleQueue()
+        self._decode_thread = Thread(target=self._decode_loop, daemon=True)
     
     def _load_model(self):
         """Load the Vosk model."""
@@ -189,32 +273,108 @@ class VoiceCommandThread(Thread):
         try:
             print(f"Loading Vosk model from {self.model_path}...")
             self.model = Model(self.model_path)
-            self.recognizer = KaldiRecognizer(self.model, SAMPLE_RATE)
+            self.recognizer = self._create_recognizer()
             print("Vosk model loaded successfully")
             return True
         except Exception as e:
             print(f"Failed to load Vosk model: {e}")
             return False
     
+    def _create_recognizer(self):
+        """Create a recognizer, warmed up so the first real utterance isn't missed."""
+        recognizer = KaldiRecognizer(self.model, SAMPLE_RATE)
+        # Vosk can miss the first seconds of audio on a cold recognizer; feed it 1 s of silence
+        recognizer.AcceptWaveform(bytes(SAMPLE_RATE * 2))
+        recognizer.Reset()
+        return recognizer
+    
+    def _is_speech(self, audio_data):
+        """Check whether a block of int16 audio contains speech."""
+        if self.vad is not None:
+            # memoryview slices are zero-copy views into the audio buffer
+            audio_view = memoryview(audio_data)
+            for start in range(0, len(audio_view) - VAD_FRAME_BYTES + 1, VAD_FRAME_BYTES):
+                if self.vad.is_speech(audio_view[start:start + VAD_FRAME_BYTES], SAMPLE_RATE):
+                    return True
+            return False
+        
+        # Square into a preallocated float buffer - no int32 copy or product temporaries
+        samples = np.frombuffer(audio_data, np.int16)
+        energy = self._energy[:len(samples)]
+        np.square(samples, out=energy, dtype=np.float32)
+        return energy.mean() >= RMS_THRESHOLD ** 2
+    
+    def _handle_result(self, result_json):
+        """Parse a Vosk result and publish any command it contains."""
+        text = _result_text(result_json)
+        
+        if text:
+            print(f"Heard: '{text}'")
+            command = parse_command(text)
+            
+            if command:
+                print(f"Command: {command}")
+                shared.put_command(command)
+    
     def _audio_callback(self, indata, frames, time_info, status):
-        """Callback for audio stream - processes audio data."""
+        """Callback for audio stream - gates silence and queues audio for decoding."""
         if status:
             print(f"Audio status: {status}")
         
-        # Convert to bytes for Vosk
-        audio_data = bytes(indata)
+        # Skip decoding silence, but keep feeding a few trailing blocks so Vosk can endpoint.
+        # The last skipped block is kept as pre-roll in case it held a soft word onset.
+        if self._is_speech(indata):
+            if self._silent_blocks > TRAILING_SILENCE_BLOCKS and self._preroll:
+                self._audio_q.put_nowait((bytes(self._preroll), False))
+            self._silent_blocks = 0
+        else:
+            self._silent_blocks += 1
+            if self._silent_blocks > TRAILING_SILENCE_BLOCKS:
+                self._preroll[:] = indata  # Reuses the buffer - no per-block allocation
+                return
         
-        if self.recognizer.AcceptWaveform(audio_data):
-            result = json.loads(self.recognizer.Result())
-            text = result.get('text', '')
-            
-            if text:
-                print(f"Heard: '{text}'")
-                command = parse_command(text)
+        # Hand off to the decoder thread (Vosk's cffi binding needs bytes)
+        flush = self._silent_blocks == TRAILING_SILENCE_BLOCKS
+        self._audio_q.put_nowait((bytes(indata), flush))
+    
+    def _decode_loop(self):
+        """Run the Vosk decoder on queued audio, off the realtime audio thread."""
+        blocks = 0
+        try:
+            while self._running:
+                item = self._audio_q.get()
+                if item is None:
+                    break
                 
-                if command:
-                    print(f"Command: {command}")
-                    shared.put_command(command)
+                audio_data, flush = item
+                if self.recognizer.AcceptWaveform(audio_data):
+                    self._handle_result(self.recognizer.Result())
+                    blocks = 0
+                elif flush:
+                    # Last block before the gate closes - flush any pending utterance
+                    self._handle_result(self.recognizer.FinalResult())
+                    blocks = 0
+                else:
+                    blocks += 1
+                    if blocks % PARTIAL_INTERVAL == 0:
+                        self._check_partial()
+        except Exception as e:
+            # run() holds the audio stream open only while this thread lives
+            print(f"Voice decoder error: {e}")
+            self._running = False
+    
+    def _check_partial(self):
+        """Dispatch short commands from a partial result without waiting for the endpoint."""
+        text = _result_text(self.recognizer.PartialResult(), _PARTIAL_RE, 'partial')
+        
+        if text in _EARLY_COMMANDS:
+            print(f"Heard (partial): '{text}'")
+            command = parse_command(text)
+            print(f"Command: {command}")
+            shared.put_command(command)
+            
+            # Drop the utterance so the final result doesn't repeat the command
+            self.recognizer.Reset()
     
     def run(self):
         """Main thread loop."""
@@ -238,6 +398,8 @@ class VoiceCommandThread(Thread):
         print(f"Starting voice recognition on device {self.device_index}...")
         print("Listening for commands: play, pause, stop, volume up/down, tracking on/off")
         
+        self._decode_thread.start()
+        
         while self._running and shared.running:
             try:
                 # Open audio stream
@@ -249,24 +411,29 @@ class VoiceCommandThread(Thread):
                     channels=1,
                     callback=self._audio_callback
                 ):
-                    # Keep stream open while running
-                    while self._running and shared.running:
-                        time.sleep(0.1)
-                        
+                    # Keep stream open until the decoder stops
+                    self._decode_thread.join()
+                
+                if not self._decode_thread.is_alive():
+                    break  # Decoder is gone - reopening the stream would do nothing
+                    
             except Exception as e:
                 print(f"Audio stream error: {e}")
                 print("Restarting audio stream in 3 seconds...")
-                time.sleep(3)
+                if self._stop_event.wait(3):
+                    break
                 
                 # Reset recognizer state
                 if self.recognizer:
-                    self.recognizer = KaldiRecognizer(self.model, SAMPLE_RATE)
+                    self.recognizer = self._create_recognizer()
         
         print("Voice command thread stopped")
     
     def stop(self):
         """Stop the voice command thread."""
         self._running = False
+        self._stop_event.set()  # Cut short a pending stream restart
+        self._audio_q.put_nowait(None)  # Wake the decoder so it can exit
 
 
 def start_voice_commands(device_index=None):
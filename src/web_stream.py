@@ -4,38 +4,30 @@ HTTP server for MJPEG video streaming.
 """
 
 import cv2
-import time
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from threading import Thread
+
+# libjpeg-turbo JPEG encoder (SIMD), falls back to cv2.imencode
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJSAMP_420
+    jpeg_encoder = TurboJPEG()
+    TURBOJPEG_AVAILABLE = True
+except Exception as e:
+    print(f"TurboJPEG not available, using OpenCV encoder: {e}")
+    jpeg_encoder = None
+    TURBOJPEG_AVAILABLE = False
 
 from .shared_state import shared
 
 # Configuration
 HOST = '0.0.0.0'
 PORT = 8080
+STREAM_SIZE = (480, 360)  # Streamed frames are downscaled to this (width, height)
+JPEG_QUALITY = 65
+JPEG_CHROMA_QUALITY = 60
 
-
-class StreamHandler(BaseHTTPRequestHandler):
-    """HTTP handler for video streaming."""
-    
-    def log_message(self, format, *args):
-        pass  # Suppress HTTP logs
-    
-    def do_GET(self):
-        if self.path == '/':
-            self._serve_index()
-        elif self.path == '/stream':
-            self._serve_stream()
-        else:
-            self.send_response(404)
-            self.end_headers()
-    
-    def _serve_index(self):
-        """Serve the HTML index page."""
-        self.send_response(200)
-        self.send_header('Content-type', 'text/html')
-        self.end_headers()
-        
-        html = '''<!DOCTYPE html>
+# Index page, encoded once at import
+_INDEX_BYTES = b'''<!DOCTYPE html>
 <html>
 <head>
     <title>Face Tracker</title>
@@ -59,7 +51,48 @@ class StreamHandler(BaseHTTPRequestHandler):
     <img src="/stream" alt="Stream">
 </body>
 </html>'''
-        self.wfile.write(html.encode())
+
+
+def encode_jpeg(frame):
+    """Downscale a frame to STREAM_SIZE and encode it as JPEG bytes."""
+    small = cv2.resize(frame, STREAM_SIZE, interpolation=cv2.INTER_LINEAR)
+    if TURBOJPEG_AVAILABLE:
+        return jpeg_encoder.encode(
+            small, quality=JPEG_QUALITY, pixel_format=TJPF_BGR, jpeg_subsample=TJSAMP_420
+        )
+    _, jpeg = cv2.imencode('.jpg', small, [
+        cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY,
+        cv2.IMWRITE_JPEG_CHROMA_QUALITY, JPEG_CHROMA_QUALITY
+    ])
+    return jpeg.tobytes()
+
+
+class StreamHandler(BaseHTTPRequestHandler):
+    """HTTP handler for video streaming."""
+    
+    # Keep-alive connections; every non-stream response sends Content-Length
+    protocol_version = 'HTTP/1.1'
+    
+    def log_message(self, format, *args):
+        pass  # Suppress HTTP logs
+    
+    def do_GET(self):
+        if self.path == '/':
+            self._serve_index()
+        elif self.path == '/stream':
+            self._serve_stream()
+        else:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+    
+    def _serve_index(self):
+        """Serve the HTML index page."""
+        self.send_response(200)
+        self.send_header('Content-type', 'text/html')
+        self.send_header('Content-Length', str(len(_INDEX_BYTES)))
+        self.end_headers()
+        self.wfile.write(_INDEX_BYTES)
     
     def _serve_stream(self):
         """Serve the MJPEG video stream."""
@@ -67,32 +100,39 @@ class StreamHandler(BaseHTTPRequestHandler):
         self.send_header('Content-type', 'multipart/x-mixed-replace; boundary=frame')
         self.end_headers()
         
+        last_version = 0
         try:
             while shared.running:
-                frame = shared.get_frame()
-                
-                if frame is None:
-                    time.sleep(0.033)
+                # Encoded once by the producer, shared by every client; only send new frames
+                jpeg_bytes, version = shared.get_jpeg_if_new(last_version)
+                if version == last_version:
+                    # Wake when the producer publishes a frame (timeout re-checks running)
+                    shared.wait_for_frame(timeout=0.1)
+                    continue
+                last_version = version
+                if jpeg_bytes is None:
                     continue
                 
-                _, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-                self.wfile.write(b'--frame\r\n')
-                self.wfile.write(b'Content-Type: image/jpeg\r\n\r\n')
-                self.wfile.write(jpeg.tobytes())
-                self.wfile.write(b'\r\n')
-                time.sleep(0.033)
+                # One write per frame: boundary, headers, image and trailer together
+                self.wfile.write(
+                    b'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n%s\r\n'
+                    % (len(jpeg_bytes), jpeg_bytes)
+                )
                 
         except (BrokenPipeError, ConnectionResetError):
             pass
 
 
 def run_web_server():
-    """Start the HTTP streaming server."""
-    server = HTTPServer((HOST, PORT), StreamHandler)
-    print(f"Web server running on port {PORT}")
+    """Start the HTTP streaming server and run it until shutdown."""
+    server = ThreadingHTTPServer((HOST, PORT), StreamHandler)
+    server.daemon_threads = True
     
-    while shared.running:
-        server.handle_request()
+    # Each client gets its own thread, so streams don't block the accept loop
+    Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Web server running on port {PORT}")
     
+    shared.wait_for_shutdown()
+    server.shutdown()
     server.server_close()
     print("Web server stopped")
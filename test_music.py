@@ -5,7 +5,34 @@ Test script for music player.
 
 import time
 import sys
-from src.music_player import start_music_player, index_music_folder
+from src.music_player import start_music_player, index_music_folder, find_best_match
+
+def _songs(*names):
+    return [
+        {'name': name, 'name_lower': name.lower(), 'filename': name + '.mp3', 'path': name + '.mp3'}
+        for name in names
+    ]
+
+def test_matching():
+    """Test that exact titles pick their song and near-misses pick nothing."""
+    songs = _songs("Bohemian Rhapsody", "Hey Jude", "Let It Be")
+    
+    for song in songs:
+        assert find_best_match(song['name'], songs) is song
+        assert find_best_match(song['name_lower'], songs) is song
+    
+    print("  ✓ exact titles match their songs")
+    
+    # Too weak to count as a match (all at or under the 0.3 cutoff)
+    near_misses = [
+        ("queen hey thx", "song be"),
+        ("it it night", "love hey moon it"),
+        ("the", "night be bohemian"),
+    ]
+    for query, name in near_misses:
+        assert find_best_match(query, _songs(name)) is None
+    
+    print("  ✓ near-misses match nothing")
 
 def main():
     print("Music Player Test")
@@ -58,4 +85,7 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    if '--match' in sys.argv:
+        test_matching()
+    else:
+        main()